@@ -3,18 +3,65 @@
 Setup configuration for sentry-terraform-migration-toolkit
 """
 
-from setuptools import setup, find_packages
+from setuptools import setup
+import functools
 import os
+import re
+
+# Generate console scripts that import the entry point directly instead of
+# going through pkg_resources.load_entry_point, which scans every installed
+# distribution at startup (same approach as the "fastentrypoints" shim).
+FAST_ENTRY_POINT_TEMPLATE = """\
+# -*- coding: utf-8 -*-
+import re
+import sys
+
+from {module} import {import_name}
+
+if __name__ == "__main__":
+    sys.argv[0] = re.sub(r"(-script\\.pyw?|\\.exe)?$", "", sys.argv[0])
+    sys.exit({call}())
+"""
+
+def _install_fast_entry_points():
+    try:
+        from setuptools.command import easy_install
+    except ImportError:
+        return
+
+    @classmethod
+    def get_args(cls, dist, header=None):
+        if header is None:
+            header = cls.get_header()
+        for type_ in ("console", "gui"):
+            for name, ep in dist.get_entry_map(f"{type_}_scripts").items():
+                if re.search(r"[\\/]", name):
+                    raise ValueError("Path separators not allowed in script names")
+                script_text = FAST_ENTRY_POINT_TEMPLATE.format(
+                    module=ep.module_name,
+                    import_name=ep.attrs[0],
+                    call=".".join(ep.attrs),
+                )
+                yield from cls._get_script_args(type_, name, header, script_text)
+
+    easy_install.ScriptWriter.get_args = get_args
+
+_install_fast_entry_points()
+
+# One requirement per line, without blank lines, comment lines or trailing comments
+REQUIREMENT_LINE_RE = re.compile(r"^[ \t]*([^#\s][^#\n]*?)[ \t]*(?:#.*)?$", re.M)
 
 # Read README for long description
+@functools.lru_cache(maxsize=1)
 def read_readme():
     with open("README.md", "r", encoding="utf-8") as fh:
         return fh.read()
 
 # Read requirements
+@functools.lru_cache(maxsize=1)
 def read_requirements():
     with open("requirements.txt", "r", encoding="utf-8") as fh:
-        return [line.strip() for line in fh if line.strip() and not line.startswith("#")]
+        return REQUIREMENT_LINE_RE.findall(fh.read())
 
 setup(
     name="sentry-terraform-discovery",
@@ -30,7 +77,8 @@ setup(
         "Source": "https://github.com/litmus-paper-blue/sentry-terraform-migration-toolkit",
         "Documentation": "https://github.com/litmus-paper-blue/sentry-terraform-migration-toolkit/blob/main/docs/",
     },
-    packages=find_packages(where="src"),
+    # Listed explicitly rather than scanned with find_packages()
+    packages=["sentry_discovery"],
     package_dir={"": "src"},
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -65,6 +113,9 @@ setup(
             "pytest-mock>=3.10.0",
             "responses>=0.22.0",
         ],
+        "fast": [
+            "orjson>=3.6.0",
+        ],
     },
     entry_points={
         "console_scripts": [
@@ -11,9 +11,21 @@ __author__ = "Ogonna Nnamani"
 __email__ = "ogonnannamani11@gmail.com"
 __description__ = "Discover Sentry resources and generate Terraform configurations"
 
-from .discovery import SentryDiscovery, SentryAPIError
-from .config import Config, load_config, save_config
-from .utils import safe_resource_name, safe_filename, validate_token, setup_logging
+import importlib
+
+# Public names are resolved lazily (PEP 562) so that importing the package,
+# e.g. for the console script, does not pull in requests/yaml up front.
+_LAZY_EXPORTS = {
+    "SentryDiscovery": ".discovery",
+    "SentryAPIError": ".discovery",
+    "Config": ".config",
+    "load_config": ".config",
+    "save_config": ".config",
+    "safe_resource_name": ".utils",
+    "safe_filename": ".utils",
+    "validate_token": ".utils",
+    "setup_logging": ".utils",
+}
 
 __all__ = [
     "SentryDiscovery",
@@ -26,3 +38,16 @@ __all__ = [
     "validate_token",
     "setup_logging",
 ]
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -4,99 +4,50 @@ CLI interface for Sentry Terraform Discovery Tool
 """
 
 import click
+import functools
 import os
 import sys
+from collections import Counter
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.progress import Progress
-from rich.table import Table
+from click.core import ParameterSource
 
-from .discovery import SentryDiscovery
-from .terraform import TerraformGenerator
-from .config import Config, load_config
 from .utils import setup_logging, validate_token
 
-console = Console()
+if TYPE_CHECKING:
+    from .config import Config
 
-@click.command()
-@click.option(
-    "--token",
-    envvar="SENTRY_AUTH_TOKEN",
-    help="Sentry auth token (or set SENTRY_AUTH_TOKEN env var)",
-)
-@click.option(
-    "--base-url",
-    envvar="SENTRY_BASE_URL",
-    default="https://sentry.io/api/0",
-    help="Sentry base URL",
-)
-@click.option(
-    "--org",
-    envvar="SENTRY_ORG",
-    help="Organization slug",
-)
-@click.option(
-    "--output-dir",
-    default="./terraform",
-    help="Output directory for generated files",
-)
-@click.option(
-    "--config-file",
-    type=click.Path(exists=True),
-    help="Configuration file path",
-)
-@click.option(
-    "--projects-only",
-    is_flag=True,
-    help="Discover projects only",
-)
-@click.option(
-    "--teams-only",
-    is_flag=True,
-    help="Discover teams only",
-)
-@click.option(
-    "--dry-run",
-    is_flag=True,
-    help="Show what would be generated without writing files",
-)
-@click.option(
-    "--template-dir",
-    type=click.Path(exists=True),
-    help="Custom template directory",
-)
-@click.option(
-    "--format",
-    "output_format",
-    type=click.Choice(["hcl", "json"]),
-    default="hcl",
-    help="Output format",
-)
-@click.option(
-    "--module-style",
-    is_flag=True,
-    help="Generate Terraform modules",
-)
-@click.option(
-    "--verbose",
-    "-v",
-    is_flag=True,
-    help="Enable verbose logging",
-)
-@click.option(
-    "--validate",
-    is_flag=True,
-    help="Validate against existing Terraform state",
-)
-@click.option(
-    "--terraform-dir",
-    type=click.Path(exists=True),
-    help="Existing Terraform directory for validation",
-)
-def main(
+_NEXT_STEPS = "\n".join(f"   {step}" for step in [
+    "1. Review the generated Terraform configuration files",
+    "2. Initialize Terraform: [bold cyan]terraform init[/bold cyan]",
+    "3. Run the import script: [bold cyan]chmod +x imports.sh && ./imports.sh[/bold cyan]",
+    "4. Verify the import: [bold cyan]terraform plan[/bold cyan]",
+    "5. Apply if everything looks good: [bold cyan]terraform apply[/bold cyan]"
+])
+
+# Generated file suffix -> type shown in the summary table
+_FILE_TYPES = {".tf": "Terraform", ".sh": "Script"}
+_format_size = "{:,} bytes".format
+
+_console = None
+
+def console():
+    """Return the shared Rich console, creating it on first use"""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+@functools.lru_cache(maxsize=None)
+def _panel(message: str):
+    """Build (once) a fitted Rich panel for a constant heading"""
+    from rich.panel import Panel
+    return Panel.fit(message)
+
+def _main(
+    ctx: click.Context,
     token: Optional[str],
     base_url: str,
     org: Optional[str],
@@ -117,54 +68,61 @@ def main(
     Discover existing Sentry resources and generate Terraform configurations
     for infrastructure-as-code migration.
     """
+    from .config import load_config
+
     setup_logging(verbose)
+    interactive = sys.stdin.isatty()
 
     # 1. Load config file if present, else use defaults
     config = load_config(config_file) if config_file else load_config()
-    print("DEBUG: Loaded token from config:", config.sentry.token)
 
     # 2. Only override config values if CLI options are explicitly set (not just their default)
-    # Use Click's 'ctx.get_parameter_source' to check if a value was set by the user
-    import click
-    ctx = click.get_current_context()
-    
-    if ctx.get_parameter_source('token').name == 'COMMANDLINE':
+    # Collect the parameters whose value came from the command line in a single pass
+    cmdline = {
+        name for name, source in ctx._parameter_source.items()
+        if source is ParameterSource.COMMANDLINE
+    }
+
+    if 'token' in cmdline:
         config.sentry.token = token
-    if ctx.get_parameter_source('base_url').name == 'COMMANDLINE':
+    if 'base_url' in cmdline:
         config.sentry.base_url = base_url
-    if ctx.get_parameter_source('org').name == 'COMMANDLINE':
+    if 'org' in cmdline:
         config.sentry.organization = org
-    if ctx.get_parameter_source('output_dir').name == 'COMMANDLINE':
+    if 'output_dir' in cmdline:
         config.terraform.output_dir = output_dir
-    if ctx.get_parameter_source('template_dir').name == 'COMMANDLINE':
+    if 'template_dir' in cmdline:
         config.terraform.template_dir = template_dir
-    if ctx.get_parameter_source('output_format').name == 'COMMANDLINE':
+    if 'output_format' in cmdline:
         config.output.format = output_format
-    if ctx.get_parameter_source('module_style').name == 'COMMANDLINE':
+    if 'module_style' in cmdline:
         config.terraform.module_style = module_style
-    if ctx.get_parameter_source('dry_run').name == 'COMMANDLINE':
+    if 'dry_run' in cmdline:
         config.output.dry_run = dry_run
 
     # 3. Only prompt for output-dir if it exists and is not empty
     from pathlib import Path
     output_path = Path(config.terraform.output_dir)
-    if output_path.exists() and any(output_path.iterdir()):
-        config.terraform.output_dir = get_output_directory(str(output_path))
+    if _is_non_empty_dir(output_path):
+        config.terraform.output_dir = get_output_directory(str(output_path), interactive)
 
     # 4. Validate required parameters (prompt only if missing)
     if not config.sentry.token:
-        if not sys.stdin.isatty():
-            console.print("❌ [red]Auth token is required. Set SENTRY_AUTH_TOKEN or use --token[/red]")
+        if not interactive:
+            console().print("❌ [red]Auth token is required. Set SENTRY_AUTH_TOKEN or use --token[/red]")
             sys.exit(1)
         config.sentry.token = click.prompt("Enter your Sentry Auth Token", hide_input=True)
 
     if not validate_token(config.sentry.token):
-        console.print("❌ [red]Invalid token format[/red]")
+        console().print("❌ [red]Invalid token format[/red]")
         sys.exit(1)
 
     if verbose:
         show_config(config)
 
+    from rich.progress import Progress
+    from .discovery import SentryDiscovery
+
     try:
         # Initialize discovery
         discovery = SentryDiscovery(
@@ -174,7 +132,7 @@ def main(
         )
         
         # Discover resources
-        console.print(Panel.fit("🔍 [bold blue]Discovering Sentry Resources[/bold blue]"))
+        console().print(_panel("🔍 [bold blue]Discovering Sentry Resources[/bold blue]"))
         
         with Progress() as progress:
             task = progress.add_task("Discovering...", total=100)
@@ -188,7 +146,7 @@ def main(
             )
         
         if not data:
-            console.print("❌ [red]Failed to discover resources[/red]")
+            console().print("❌ [red]Failed to discover resources[/red]")
             sys.exit(1)
         
         # Show summary
@@ -196,12 +154,13 @@ def main(
         
         # Generate Terraform configurations
         if not validate:
-            console.print(Panel.fit("📝 [bold green]Generating Terraform Configurations[/bold green]"))
+            console().print(_panel("📝 [bold green]Generating Terraform Configurations[/bold green]"))
             
+            from .terraform import TerraformGenerator
             generator = TerraformGenerator(config)
             
             if dry_run:
-                console.print("🔍 [yellow]Dry run mode - showing what would be generated:[/yellow]")
+                console().print("🔍 [yellow]Dry run mode - showing what would be generated:[/yellow]")
                 generator.preview(data)
             else:
                 output_files = generator.generate(data)
@@ -211,31 +170,122 @@ def main(
         # Validation mode
         if validate:
             if not terraform_dir:
-                console.print("❌ [red]--terraform-dir required for validation[/red]")
+                console().print("❌ [red]--terraform-dir required for validation[/red]")
                 sys.exit(1)
             
-            console.print(Panel.fit("✅ [bold purple]Validating Terraform State[/bold purple]"))
+            console().print(_panel("✅ [bold purple]Validating Terraform State[/bold purple]"))
             # TODO: Implement validation logic
-            console.print("🚧 [yellow]Validation feature coming soon![/yellow]")
+            console().print("🚧 [yellow]Validation feature coming soon![/yellow]")
     
     except KeyboardInterrupt:
-        console.print("\n❌ [red]Operation cancelled by user[/red]")
+        console().print("\n❌ [red]Operation cancelled by user[/red]")
         sys.exit(1)
     except Exception as e:
-        console.print(f"❌ [red]Error: {str(e)}[/red]")
+        console().print(f"❌ [red]Error: {str(e)}[/red]")
         if verbose:
-            console.print_exception()
+            console().print_exception()
         sys.exit(1)
 
-def get_output_directory(default_dir: str) -> str:
+main = click.Command(
+    "sentry-discovery",
+    callback=click.pass_context(_main),
+    help=_main.__doc__,
+    params=[
+        click.Option(
+            ["--token"],
+            envvar="SENTRY_AUTH_TOKEN",
+            help="Sentry auth token (or set SENTRY_AUTH_TOKEN env var)",
+        ),
+        click.Option(
+            ["--base-url"],
+            envvar="SENTRY_BASE_URL",
+            default="https://sentry.io/api/0",
+            help="Sentry base URL",
+        ),
+        click.Option(
+            ["--org"],
+            envvar="SENTRY_ORG",
+            help="Organization slug",
+        ),
+        click.Option(
+            ["--output-dir"],
+            default="./terraform",
+            help="Output directory for generated files",
+        ),
+        click.Option(
+            ["--config-file"],
+            type=click.Path(exists=True),
+            help="Configuration file path",
+        ),
+        click.Option(
+            ["--projects-only"],
+            is_flag=True,
+            help="Discover projects only",
+        ),
+        click.Option(
+            ["--teams-only"],
+            is_flag=True,
+            help="Discover teams only",
+        ),
+        click.Option(
+            ["--dry-run"],
+            is_flag=True,
+            help="Show what would be generated without writing files",
+        ),
+        click.Option(
+            ["--template-dir"],
+            type=click.Path(exists=True),
+            help="Custom template directory",
+        ),
+        click.Option(
+            ["--format", "output_format"],
+            type=click.Choice(["hcl", "json"]),
+            default="hcl",
+            help="Output format",
+        ),
+        click.Option(
+            ["--module-style"],
+            is_flag=True,
+            help="Generate Terraform modules",
+        ),
+        click.Option(
+            ["--verbose", "-v"],
+            is_flag=True,
+            help="Enable verbose logging",
+        ),
+        click.Option(
+            ["--validate"],
+            is_flag=True,
+            help="Validate against existing Terraform state",
+        ),
+        click.Option(
+            ["--terraform-dir"],
+            type=click.Path(exists=True),
+            help="Existing Terraform directory for validation",
+        ),
+    ],
+)
+
+def _is_non_empty_dir(path: Path) -> bool:
+    """Check whether a directory exists and has at least one entry"""
+    try:
+        with os.scandir(path) as it:
+            return next(it, None) is not None
+    except FileNotFoundError:
+        return False
+
+def get_output_directory(default_dir: str, interactive: Optional[bool] = None) -> str:
     """Get output directory with interactive prompts for conflicts"""
     import sys
     from datetime import datetime
     from pathlib import Path
     
+    if interactive is None:
+        interactive = sys.stdin.isatty()
+    
     while True:
-        if sys.stdin.isatty():  # Interactive terminal
-            output_dir = input(f"Enter output directory (default: {default_dir}): ").strip()
+        if interactive:  # Interactive terminal
+            output_dir = click.prompt("Enter output directory", default=default_dir, type=str).strip()
             if not output_dir:
                 output_dir = default_dir
         else:
@@ -244,10 +294,16 @@ def get_output_directory(default_dir: str) -> str:
         
         output_path = Path(output_dir)
         
-        if output_path.exists() and any(output_path.iterdir()):
-            if sys.stdin.isatty():
+        try:
+            with os.scandir(output_path) as it:
+                entries = list(it)
+        except FileNotFoundError:
+            entries = []
+        
+        if entries:
+            if interactive:
                 print(f"\n⚠️  Directory '{output_dir}' already exists and is not empty!")
-                print(f"Contents: {len(list(output_path.iterdir()))} files/folders")
+                print(f"Contents: {len(entries)} files/folders")
                 choice = input("Choose action: (r)eplace, (m)erge, (n)ew directory, (a)bort: ").lower().strip()
                 
                 if choice in ['r', 'replace']:
@@ -274,8 +330,10 @@ def get_output_directory(default_dir: str) -> str:
         else:
             return output_dir
 
-def show_config(config: Config):
+def show_config(config: "Config"):
     """Display current configuration"""
+    from rich.table import Table
+
     table = Table(title="Configuration")
     table.add_column("Setting", style="cyan")
     table.add_column("Value", style="green")
@@ -287,37 +345,43 @@ def show_config(config: Config):
     table.add_row("Module Style", "Yes" if config.terraform.module_style else "No")
     table.add_row("Dry Run", "Yes" if config.output.dry_run else "No")
     
-    console.print(table)
-    console.print()
+    console().print(table)
+    console().print()
 
 def detect_version_changes(output_dir: str) -> bool:
     """Detect if this is a new version of discovery data"""
     import json
     from pathlib import Path
-    from datetime import datetime
+    from datetime import datetime, timedelta
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
     
     metadata_file = Path(output_dir) / ".sentry-discovery-metadata.json"
+    now = datetime.now()
     
     current_metadata = {
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": now.isoformat(),
         "version": "1.0.0",  # Tool version
-        "discovery_id": datetime.now().strftime("%Y%m%d_%H%M%S")
+        "discovery_id": now.strftime("%Y%m%d_%H%M%S")
     }
     
     if metadata_file.exists():
         try:
-            with open(metadata_file, 'r') as f:
-                previous_metadata = json.load(f)
+            if orjson is not None:
+                previous_metadata = orjson.loads(metadata_file.read_bytes())
+            else:
+                previous_metadata = json.loads(metadata_file.read_text())
             
             # Check if significant time has passed (new discovery session)
-            from datetime import datetime, timedelta
             prev_time = datetime.fromisoformat(previous_metadata["timestamp"])
-            current_time = datetime.now()
             
-            if current_time - prev_time > timedelta(hours=1):
+            if now - prev_time > timedelta(hours=1):
                 print(f"🔄 New discovery session detected")
                 print(f"   Previous: {prev_time.strftime('%Y-%m-%d %H:%M:%S')}")
-                print(f"   Current:  {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"   Current:  {now.strftime('%Y-%m-%d %H:%M:%S')}")
                 return True
         except Exception as e:
             print(f"⚠️  Could not read previous metadata: {e}")
@@ -325,29 +389,19 @@ def detect_version_changes(output_dir: str) -> bool:
     # Save current metadata
     try:
         Path(output_dir).mkdir(parents=True, exist_ok=True)
-        with open(metadata_file, 'w') as f:
-            json.dump(current_metadata, f, indent=2)
+        if orjson is not None:
+            metadata_file.write_bytes(orjson.dumps(current_metadata, option=orjson.OPT_INDENT_2))
+        else:
+            metadata_file.write_text(json.dumps(current_metadata, indent=2))
     except Exception as e:
         print(f"⚠️  Could not save metadata: {e}")
     
     return False
-    """Display current configuration"""
-    table = Table(title="Configuration")
-    table.add_column("Setting", style="cyan")
-    table.add_column("Value", style="green")
-    
-    table.add_row("Base URL", config.sentry.base_url)
-    table.add_row("Organization", config.sentry.organization or "Auto-detect")
-    table.add_row("Output Directory", config.terraform.output_dir)
-    table.add_row("Output Format", config.output.format)
-    table.add_row("Module Style", "Yes" if config.terraform.module_style else "No")
-    table.add_row("Dry Run", "Yes" if config.output.dry_run else "No")
-    
-    console.print(table)
-    console.print()
 
 def show_discovery_summary(data: dict):
     """Display summary of discovered resources"""
+    from rich.table import Table
+
     org = data.get('organization', {})
     teams = data.get('teams', [])
     projects = data.get('projects', [])
@@ -359,27 +413,26 @@ def show_discovery_summary(data: dict):
     table.add_column("Details", style="yellow")
     
     # Team details
-    team_members = sum(len(team.get('members', [])) for team in teams)
+    team_members = sum(map(len, (team.get('members', ()) for team in teams)))
     table.add_row("Teams", str(len(teams)), f"{team_members} total members")
     
     # Project details
-    project_platforms = {}
-    for project in projects:
-        platform = project.get('platform', 'unknown')
-        project_platforms[platform] = project_platforms.get(platform, 0) + 1
+    project_platforms = Counter(project.get('platform', 'unknown') for project in projects)
     
     platform_summary = ", ".join(f"{count} {platform}" for platform, count in project_platforms.items())
     table.add_row("Projects", str(len(projects)), platform_summary)
     
-    console.print(table)
-    console.print()
+    console().print(table)
+    console().print()
 
 def show_generated_files(output_files: list):
     """Display list of generated files"""
     if not output_files:
-        console.print("⚠️  [yellow]No files generated[/yellow]")
+        console().print("⚠️  [yellow]No files generated[/yellow]")
         return
     
+    from rich.table import Table
+
     table = Table(title="📁 Generated Files")
     table.add_column("File", style="cyan")
     table.add_column("Type", style="green")
@@ -387,30 +440,24 @@ def show_generated_files(output_files: list):
     
     for file_path in output_files:
         path = Path(file_path)
-        file_type = "Terraform" if path.suffix == ".tf" else "Script" if path.suffix == ".sh" else "Other"
-        size = f"{path.stat().st_size:,} bytes" if path.exists() else "Unknown"
+        file_type = _FILE_TYPES.get(os.path.splitext(file_path)[1], "Other")
+        # A single stat() both checks existence and gives the size
+        try:
+            size = _format_size(os.stat(file_path).st_size)
+        except FileNotFoundError:
+            size = "Unknown"
         table.add_row(str(path), file_type, size)
     
-    console.print(table)
-    console.print()
+    console().print(table)
+    console().print()
 
 def show_next_steps(output_files: list):
     """Display next steps for the user"""
-    console.print(Panel.fit("🚀 [bold green]Next Steps[/bold green]"))
-    
-    steps = [
-        "1. Review the generated Terraform configuration files",
-        "2. Initialize Terraform: [bold cyan]terraform init[/bold cyan]",
-        "3. Run the import script: [bold cyan]chmod +x imports.sh && ./imports.sh[/bold cyan]",
-        "4. Verify the import: [bold cyan]terraform plan[/bold cyan]",
-        "5. Apply if everything looks good: [bold cyan]terraform apply[/bold cyan]"
-    ]
-    
-    for step in steps:
-        console.print(f"   {step}")
+    console().print(_panel("🚀 [bold green]Next Steps[/bold green]"))
+    console().print(_NEXT_STEPS)
     
-    console.print()
-    console.print("💡 [blue]Tip: Run with --dry-run first to preview changes[/blue]")
+    console().print()
+    console().print("💡 [blue]Tip: Run with --dry-run first to preview changes[/blue]")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,34 +3,49 @@
 Configuration management for Sentry Discovery Tool
 """
 
+import copy
 import os
 import yaml
 from pathlib import Path
-from typing import Optional, Dict, Any
-from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Tuple
+from dataclasses import dataclass, field, fields
 from dotenv import load_dotenv
 
+# Prefer the libyaml C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+
 # Load environment variables from .env file
 load_dotenv()
 
+# Sentry settings from the environment, read once after .env has been applied
+_ENV = {
+    name: os.environ.get(name)
+    for name in ("SENTRY_AUTH_TOKEN", "SENTRY_BASE_URL", "SENTRY_ORG")
+}
+
 @dataclass
 class SentryConfig:
     """Sentry API configuration"""
-    token: Optional[str] = None
+    # Secrets are read from config files but never written back by to_dict()
+    token: Optional[str] = field(default=None, metadata={"serialize": False})
     base_url: str = "https://sentry.io/api/0"
     organization: Optional[str] = None
     timeout: int = 30
     retry_attempts: int = 3
-    is_self_hosted: bool = False  # New flag for self-hosted instances
+    # Derived from base_url in __post_init__, so neither read from nor written to config files
+    is_self_hosted: bool = field(default=False, metadata={"serialize": False, "load": False})  # New flag for self-hosted instances
     
     def __post_init__(self):
         # Load from environment if not set
         if not self.token:
-            self.token = os.getenv("SENTRY_AUTH_TOKEN")
+            self.token = _ENV["SENTRY_AUTH_TOKEN"]
         if self.base_url == "https://sentry.io/api/0":
-            self.base_url = os.getenv("SENTRY_BASE_URL", self.base_url)
+            self.base_url = _ENV["SENTRY_BASE_URL"] or self.base_url
         if not self.organization:
-            self.organization = os.getenv("SENTRY_ORG")
+            self.organization = _ENV["SENTRY_ORG"]
         
         # Auto-detect self-hosted if not using sentry.io
         if "sentry.io" not in self.base_url:
@@ -93,42 +108,12 @@ class Config:
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
         return {
-            'sentry': {
-                'base_url': self.sentry.base_url,
-                'organization': self.sentry.organization,
-                'timeout': self.sentry.timeout,
-                'retry_attempts': self.sentry.retry_attempts,
-            },
-            'terraform': {
-                'output_dir': self.terraform.output_dir,
-                'module_style': self.terraform.module_style,
-                'import_script': self.terraform.import_script,
-                'terraform_version': self.terraform.terraform_version,
-                'provider_version': self.terraform.provider_version,
-                'template_dir': self.terraform.template_dir,
-                'resource_prefix': self.terraform.resource_prefix,
-                'safe_naming': self.terraform.safe_naming,
-                'include_comments': self.terraform.include_comments,
-                'include_locals': self.terraform.include_locals,
-                'include_outputs': self.terraform.include_outputs,
-            },
-            'output': {
-                'format': self.output.format,
-                'dry_run': self.output.dry_run,
-                'verbose': self.output.verbose,
-                'include_metadata': self.output.include_metadata,
-                'separate_files': self.output.separate_files,
-                'file_naming': self.output.file_naming,
-            },
-            'filters': {
-                'include_projects': self.filters.include_projects,
-                'exclude_projects': self.filters.exclude_projects,
-                'include_teams': self.filters.include_teams,
-                'exclude_teams': self.filters.exclude_teams,
-                'include_platforms': self.filters.include_platforms,
-                'exclude_platforms': self.filters.exclude_platforms,
-                'include_active_only': self.filters.include_active_only,
+            section.name: {
+                f.name: getattr(getattr(self, section.name), f.name)
+                for f in fields(getattr(self, section.name))
+                if f.metadata.get("serialize", True)
             }
+            for section in fields(self)
         }
     
     @classmethod
@@ -136,53 +121,21 @@ class Config:
         """Create config from dictionary"""
         config = cls()
         
-        # Update sentry config
-        if 'sentry' in data:
-            sentry_data = data['sentry']
-            config.sentry.base_url = sentry_data.get('base_url', config.sentry.base_url)
-            config.sentry.organization = sentry_data.get('organization', config.sentry.organization)
-            config.sentry.token = sentry_data.get('token', config.sentry.token)
-            config.sentry.timeout = sentry_data.get('timeout', config.sentry.timeout)
-            config.sentry.retry_attempts = sentry_data.get('retry_attempts', config.sentry.retry_attempts)
-        
-        # Update terraform config
-        if 'terraform' in data:
-            tf_data = data['terraform']
-            config.terraform.output_dir = tf_data.get('output_dir', config.terraform.output_dir)
-            config.terraform.module_style = tf_data.get('module_style', config.terraform.module_style)
-            config.terraform.import_script = tf_data.get('import_script', config.terraform.import_script)
-            config.terraform.terraform_version = tf_data.get('terraform_version', config.terraform.terraform_version)
-            config.terraform.provider_version = tf_data.get('provider_version', config.terraform.provider_version)
-            config.terraform.template_dir = tf_data.get('template_dir', config.terraform.template_dir)
-            config.terraform.resource_prefix = tf_data.get('resource_prefix', config.terraform.resource_prefix)
-            config.terraform.safe_naming = tf_data.get('safe_naming', config.terraform.safe_naming)
-            config.terraform.include_comments = tf_data.get('include_comments', config.terraform.include_comments)
-            config.terraform.include_locals = tf_data.get('include_locals', config.terraform.include_locals)
-            config.terraform.include_outputs = tf_data.get('include_outputs', config.terraform.include_outputs)
-        
-        # Update output config
-        if 'output' in data:
-            output_data = data['output']
-            config.output.format = output_data.get('format', config.output.format)
-            config.output.dry_run = output_data.get('dry_run', config.output.dry_run)
-            config.output.verbose = output_data.get('verbose', config.output.verbose)
-            config.output.include_metadata = output_data.get('include_metadata', config.output.include_metadata)
-            config.output.separate_files = output_data.get('separate_files', config.output.separate_files)
-            config.output.file_naming = output_data.get('file_naming', config.output.file_naming)
-        
-        # Update filters config
-        if 'filters' in data:
-            filter_data = data['filters']
-            config.filters.include_projects = filter_data.get('include_projects', config.filters.include_projects)
-            config.filters.exclude_projects = filter_data.get('exclude_projects', config.filters.exclude_projects)
-            config.filters.include_teams = filter_data.get('include_teams', config.filters.include_teams)
-            config.filters.exclude_teams = filter_data.get('exclude_teams', config.filters.exclude_teams)
-            config.filters.include_platforms = filter_data.get('include_platforms', config.filters.include_platforms)
-            config.filters.exclude_platforms = filter_data.get('exclude_platforms', config.filters.exclude_platforms)
-            config.filters.include_active_only = filter_data.get('include_active_only', config.filters.include_active_only)
+        # Only touch the settings that are present in the data
+        for section in fields(config):
+            section_data = data.get(section.name)
+            if not section_data:
+                continue
+            section_config = getattr(config, section.name)
+            for f in fields(section_config):
+                if f.name in section_data and f.metadata.get("load", True):
+                    setattr(section_config, f.name, section_data[f.name])
         
         return config
 
+# Parsed config files keyed by path, with the (mtime_ns, size) they were parsed at
+_CONFIG_CACHE: Dict[str, Tuple[int, int, Config]] = {}
+
 def load_config(config_path: Optional[str] = None) -> Config:
     """Load configuration from file"""
     if config_path:
@@ -205,13 +158,19 @@ def load_config(config_path: Optional[str] = None) -> Config:
         return Config()
     
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+        stat = config_file.stat()
+        cache_key = str(config_file.resolve())
+        cached = _CONFIG_CACHE.get(cache_key)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            # Hand out copies so callers can't mutate the cached config
+            return copy.deepcopy(cached[2])
         
-        if not data:
-            return Config()
+        with open(config_file, 'r', encoding='utf-8') as f:
+            data = yaml.load(f, Loader=SafeLoader)
         
-        return Config.from_dict(data)
+        config = Config.from_dict(data) if data else Config()
+        _CONFIG_CACHE[cache_key] = (stat.st_mtime_ns, stat.st_size, config)
+        return copy.deepcopy(config)
     
     except Exception as e:
         raise ValueError(f"Error loading config file {config_file}: {e}")
@@ -223,7 +182,7 @@ def save_config(config: Config, config_path: str):
     
     try:
         with open(config_file, 'w', encoding='utf-8') as f:
-            yaml.dump(config.to_dict(), f, default_flow_style=False, indent=2)
+            yaml.dump(config.to_dict(), f, Dumper=SafeDumper, default_flow_style=False, indent=2)
     except Exception as e:
         raise ValueError(f"Error saving config file {config_file}: {e}")
 
@@ -251,6 +210,9 @@ def create_sample_config(output_path: str):
     
     save_config(config, output_path)
 
+_VALID_FORMATS = frozenset({"hcl", "json", "yaml"})
+_VALID_FILE_NAMING = frozenset({"resource_type", "alphabetical", "custom"})
+
 def validate_config(config: Config) -> list:
     """Validate configuration and return list of issues"""
     issues = []
@@ -276,10 +238,10 @@ def validate_config(config: Config) -> list:
         issues.append(f"Template directory does not exist: {config.terraform.template_dir}")
     
     # Validate output config
-    if config.output.format not in ["hcl", "json", "yaml"]:
+    if config.output.format not in _VALID_FORMATS:
         issues.append("Output format must be 'hcl', 'json', or 'yaml'")
     
-    if config.output.file_naming not in ["resource_type", "alphabetical", "custom"]:
+    if config.output.file_naming not in _VALID_FILE_NAMING:
         issues.append("File naming must be 'resource_type', 'alphabetical', or 'custom'")
     
     return issues
\ No newline at end of file
@@ -3,53 +3,132 @@
 Core discovery logic for Sentry resources
 """
 
+import copy
+import functools
+import json
 import requests
+import urllib3
+import threading
 import time
 import logging
-from typing import Dict, List, Any, Optional, Callable
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Callable, Iterable
 from dataclasses import dataclass
-from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Payload keys every resource keeps, whatever fields the caller asked for
+_REQUIRED_FIELDS = frozenset({"id", "slug", "name"})
+
+
+def _select_fields(
+    items: List[Dict[str, Any]], fields: Optional[Iterable[str]]
+) -> List[Dict[str, Any]]:
+    """Trim API payloads down to the requested keys (all keys if fields is None)"""
+    if fields is None:
+        return items
+    keep = _REQUIRED_FIELDS.union(fields)
+    return [{k: v for k, v in item.items() if k in keep} for item in items]
+
 
 @dataclass
 class SentryResource:
-    """Base class for Sentry resources"""
+    """Base class for Sentry resources
+
+    Typed attributes are read straight from the API payload in ``raw_data``
+    rather than being copied out of it.
+    """
+
+    __slots__ = ("raw_data",)
 
-    id: str
-    slug: str
-    name: str
     raw_data: Dict[str, Any]
 
+    @property
+    def id(self) -> str:
+        return self.raw_data["id"]
+
+    @property
+    def slug(self) -> str:
+        return self.raw_data["slug"]
+
+    @property
+    def name(self) -> str:
+        return self.raw_data["name"]
+
 
 @dataclass
 class SentryOrganization(SentryResource):
     """Sentry organization resource"""
 
-    features: List[str]
-    status: Dict[str, Any]
+    __slots__ = ()
+
+    @property
+    def features(self) -> List[str]:
+        return self.raw_data.get("features", [])
+
+    @property
+    def status(self) -> Dict[str, Any]:
+        return self.raw_data.get("status", {})
 
 
 @dataclass
 class SentryTeam(SentryResource):
     """Sentry team resource"""
 
+    __slots__ = ("organization", "members")
+
     organization: str
     members: List[Dict[str, Any]]
-    projects: List[str]
+
+    @property
+    def projects(self) -> List[str]:
+        return self.raw_data.get("projects", [])
 
 
 @dataclass
 class SentryProject(SentryResource):
     """Sentry project resource"""
 
+    __slots__ = ("organization", "teams", "details_loader", "_details")
+
     organization: str
-    platform: str
     teams: List[Dict[str, Any]]
-    status: str
-    features: List[str]
-    options: Dict[str, Any]
+    details_loader: Callable[[], Dict[str, Any]]
+
+    def __post_init__(self):
+        self._details: Optional[Dict[str, Any]] = None
+
+    @property
+    def platform(self) -> str:
+        return self.raw_data.get("platform", "other")
+
+    @property
+    def status(self) -> str:
+        return self.raw_data.get("status", "unknown")
+
+    @property
+    def features(self) -> List[str]:
+        return self.raw_data.get("features", [])
+
+    @property
+    def details(self) -> Dict[str, Any]:
+        """Full project details, fetched on first access"""
+        if self._details is None:
+            self._details = self.details_loader() or {}
+        return self._details
+
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Project options from the project details"""
+        return self.details.get("options", {})
 
 
 class SentryAPIError(Exception):
@@ -61,6 +140,32 @@ class SentryAPIError(Exception):
         self.response = response
 
 
+class _RateLimiter:
+    """Token bucket shared by all worker threads issuing API requests"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            # Going negative reserves a future slot for this caller
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+
 class SentryDiscovery:
     """Main discovery class for Sentry resources"""
 
@@ -71,12 +176,16 @@ class SentryDiscovery:
         timeout: int = 30,
         retry_attempts: int = 3,
         verbose: bool = False,
+        max_workers: int = 10,
     ):
         self.auth_token = auth_token
         self.base_url = base_url.rstrip("/")
+        # Endpoints are always server-relative paths under the API base URL
+        self._url_prefix = self.base_url + "/"
         self.timeout = timeout
         self.retry_attempts = retry_attempts
         self.verbose = verbose
+        self.max_workers = max_workers
 
         self.headers = {
             "Authorization": f"Bearer {auth_token}",
@@ -84,83 +193,149 @@ class SentryDiscovery:
             "User-Agent": "sentry-terraform-discovery/1.0.0",
         }
 
-        # Session for connection pooling
+        # Session for connection pooling, sized for the concurrent workers
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        retry = Retry(
+            total=retry_attempts,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=20,
+            pool_maxsize=max(50, max_workers),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
 
-        # Rate limiting
-        self.last_request_time = 0
-        self.min_request_interval = 0.1  # 100ms between requests
+        # Rate limiting, shared by concurrent workers: 100ms between requests
+        # on average, with bursts of up to max_workers requests
+        self._rate_limiter = _RateLimiter(rate=10.0, burst=max_workers)
+
+        # LRU cache of per-resource responses (team members, project teams/details)
+        self._response_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._response_cache_size = 1024
+        self._cache_lock = threading.Lock()
 
         logger.info(f"Initialized SentryDiscovery with base_url: {self.base_url}")
 
+    @property
+    def min_request_interval(self) -> float:
+        """Average seconds between API requests; 0 disables rate limiting"""
+        return 1 / self._rate_limiter.rate
+
+    @min_request_interval.setter
+    def min_request_interval(self, value: float):
+        self._rate_limiter.rate = 1 / value if value > 0 else float("inf")
+
     def _make_request(
         self, endpoint: str, params: Optional[Dict] = None
     ) -> Dict[str, Any]:
         """Make authenticated request to Sentry API with retry logic"""
-        url = urljoin(self.base_url + "/", endpoint.lstrip("/"))
+        url = self._url_prefix + endpoint.lstrip("/")
 
-        for attempt in range(self.retry_attempts + 1):
-            try:
-                # Rate limiting
-                current_time = time.time()
-                time_since_last = current_time - self.last_request_time
-                if time_since_last < self.min_request_interval:
-                    time.sleep(self.min_request_interval - time_since_last)
-
-                logger.debug(f"Making request to {url} (attempt {attempt + 1})")
-
-                response = self.session.get(url, params=params, timeout=self.timeout)
-
-                self.last_request_time = time.time()
-
-                # Handle different response codes
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 204:
-                    return {}
-                elif response.status_code == 404:
-                    logger.warning(f"Resource not found: {url}")
-                    return {}
-                elif response.status_code == 429:  # Rate limited
-                    retry_after = int(response.headers.get("Retry-After", 60))
-                    logger.warning(f"Rate limited, waiting {retry_after} seconds")
-                    time.sleep(retry_after)
-                    continue
-                elif response.status_code in [401, 403]:
-                    raise SentryAPIError(
-                        f"Authentication failed: {response.status_code} - {response.text}",
-                        response.status_code,
-                        response.text,
-                    )
-                else:
-                    response.raise_for_status()
-
-            except requests.exceptions.Timeout:
-                if attempt < self.retry_attempts:
-                    wait_time = 2**attempt  # Exponential backoff
-                    logger.warning(f"Request timeout, retrying in {wait_time} seconds")
-                    time.sleep(wait_time)
-                    continue
+        # Rate limiting
+        self._rate_limiter.acquire()
+
+        logger.debug(f"Making request to {url}")
+
+        # Retries with backoff for timeouts, connection errors, 429 and 5xx
+        # responses happen in the session's transport adapter
+        try:
+            response = self.session.get(
+                url, params=params, timeout=self.timeout, stream=True
+            )
+        except requests.exceptions.Timeout:
+            raise SentryAPIError(
+                f"Request timeout after {self.retry_attempts} retries"
+            )
+        except requests.exceptions.ConnectionError as e:
+            # Read timeouts that exhaust the adapter's retries surface as a
+            # ConnectionError wrapping MaxRetryError(reason=ReadTimeoutError)
+            reason = getattr(e.args[0], "reason", None) if e.args else None
+            if isinstance(reason, urllib3.exceptions.ReadTimeoutError):
                 raise SentryAPIError(
                     f"Request timeout after {self.retry_attempts} retries"
                 )
-
-            except requests.exceptions.ConnectionError:
-                if attempt < self.retry_attempts:
-                    wait_time = 2**attempt
-                    logger.warning(f"Connection error, retrying in {wait_time} seconds")
-                    time.sleep(wait_time)
-                    continue
+            raise SentryAPIError(
+                f"Connection error after {self.retry_attempts} retries"
+            )
+        except requests.exceptions.RequestException as e:
+            raise SentryAPIError(f"Request failed: {str(e)}")
+
+        # The body is streamed, so release the connection once we are done with it
+        with response:
+            # Handle different response codes
+            if response.status_code == 200:
+                return self._decode_json(response)
+            elif response.status_code == 204:
+                return {}
+            elif response.status_code == 404:
+                logger.warning(f"Resource not found: {url}")
+                return {}
+            elif response.status_code == 429:  # Still rate limited after retries
+                raise SentryAPIError(
+                    f"Rate limited after {self.retry_attempts} retries",
+                    response.status_code,
+                    response.text,
+                )
+            elif response.status_code in [401, 403]:
                 raise SentryAPIError(
-                    f"Connection error after {self.retry_attempts} retries"
+                    f"Authentication failed: {response.status_code} - {response.text}",
+                    response.status_code,
+                    response.text,
                 )
 
+            try:
+                response.raise_for_status()
             except requests.exceptions.RequestException as e:
-                raise SentryAPIError(f"Request failed: {str(e)}")
+                raise SentryAPIError(
+                    f"Request failed: {str(e)}", response.status_code, response.text
+                )
+            raise SentryAPIError(
+                f"Unexpected response: {response.status_code}",
+                response.status_code,
+                response.text,
+            )
 
-        raise SentryAPIError(
-            f"Failed to make request after {self.retry_attempts + 1} attempts"
+    @staticmethod
+    def _decode_json(response: requests.Response) -> Any:
+        """Decode a streamed JSON body without buffering it in response.content"""
+        try:
+            body = response.raw.read(decode_content=True)
+            if orjson is not None:
+                return orjson.loads(body)
+            return json.loads(body)
+        except (urllib3.exceptions.HTTPError, ValueError) as e:
+            raise SentryAPIError(f"Request failed: {str(e)}")
+
+    def _cached_request(self, endpoint: str) -> Any:
+        """Make request to Sentry API, reusing earlier responses for the endpoint"""
+        with self._cache_lock:
+            if endpoint in self._response_cache:
+                self._response_cache.move_to_end(endpoint)
+                # Hand out copies so callers can't mutate the cached response
+                return copy.deepcopy(self._response_cache[endpoint])
+
+        data = self._make_request(endpoint)
+
+        with self._cache_lock:
+            self._response_cache[endpoint] = copy.deepcopy(data)
+            if len(self._response_cache) > self._response_cache_size:
+                self._response_cache.popitem(last=False)
+        return data
+
+    def invalidate(self):
+        """Drop cached responses so that the next discovery refetches them"""
+        with self._cache_lock:
+            self._response_cache.clear()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        """Create a bounded worker pool for fanning out per-resource requests"""
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="sentry-discovery"
         )
 
     def get_organizations(self) -> List[SentryOrganization]:
@@ -174,40 +349,41 @@ class SentryDiscovery:
 
         organizations = []
         for org_data in data:
-            org = SentryOrganization(
-                id=org_data["id"],
-                slug=org_data["slug"],
-                name=org_data["name"],
-                features=org_data.get("features", []),
-                status=org_data.get("status", {}),
-                raw_data=org_data,
-            )
-            organizations.append(org)
+            organizations.append(SentryOrganization(raw_data=org_data))
 
         logger.info(f"Found {len(organizations)} organizations")
         return organizations
 
-    def get_teams(self, org_slug: str) -> List[SentryTeam]:
-        """Get all teams in the organization"""
+    def get_teams(
+        self, org_slug: str, fields: Optional[Iterable[str]] = None
+    ) -> List[SentryTeam]:
+        """Get all teams in the organization
+
+        If ``fields`` is given, only those payload keys (plus id, slug and
+        name) are kept in each team's ``raw_data``.
+        """
         logger.info(f"Fetching teams for organization: {org_slug}")
 
         data = self._make_request(f"/organizations/{org_slug}/teams/")
         if not isinstance(data, list):
             return []
+        data = _select_fields(data, fields)
+
+        # Fetch members of all teams concurrently
+        team_slugs = [team_data["slug"] for team_data in data]
+        with self._executor() as executor:
+            team_members = list(
+                executor.map(
+                    self.get_team_members, [org_slug] * len(team_slugs), team_slugs
+                )
+            )
 
         teams = []
-        for team_data in data:
-            # Get team members
-            members = self.get_team_members(org_slug, team_data["slug"])
-
+        for team_data, members in zip(data, team_members):
             team = SentryTeam(
-                id=team_data["id"],
-                slug=team_data["slug"],
-                name=team_data["name"],
+                raw_data=team_data,
                 organization=org_slug,
                 members=members,
-                projects=team_data.get("projects", []),
-                raw_data=team_data,
             )
             teams.append(team)
 
@@ -218,7 +394,7 @@ class SentryDiscovery:
         """Get all members of a specific team"""
         logger.debug(f"Fetching members for team: {org_slug}/{team_slug}")
 
-        data = self._make_request(
+        data = self._cached_request(
             f"/organizations/{org_slug}/teams/{team_slug}/members/"
         )
         if not isinstance(data, list):
@@ -226,33 +402,52 @@ class SentryDiscovery:
 
         return data
 
-    def get_projects(self, org_slug: str) -> List[SentryProject]:
-        """Get all projects in the organization"""
+    def get_projects(
+        self,
+        org_slug: str,
+        eager_details: bool = False,
+        fields: Optional[Iterable[str]] = None,
+    ) -> List[SentryProject]:
+        """Get all projects in the organization
+
+        Project details are fetched lazily on first access to
+        ``SentryProject.details``/``options`` unless ``eager_details`` is set.
+        If ``fields`` is given, only those payload keys (plus id, slug and
+        name) are kept in each project's ``raw_data``.
+        """
         logger.info(f"Fetching projects for organization: {org_slug}")
 
         data = self._make_request(f"/organizations/{org_slug}/projects/")
         if not isinstance(data, list):
             return []
+        data = _select_fields(data, fields)
+
+        # Fetch teams (and details, if requested) of all projects concurrently
+        project_slugs = [project_data["slug"] for project_data in data]
+        org_slugs = [org_slug] * len(project_slugs)
+        with self._executor() as executor:
+            teams_results = executor.map(self.get_project_teams, org_slugs, project_slugs)
+            if eager_details:
+                details_loaders = [
+                    executor.submit(self.get_project_details, org_slug, slug).result
+                    for slug in project_slugs
+                ]
+            else:
+                details_loaders = [
+                    functools.partial(self.get_project_details, org_slug, slug)
+                    for slug in project_slugs
+                ]
+            project_teams = list(teams_results)
 
         projects = []
-        for project_data in data:
-            # Get project teams
-            teams = self.get_project_teams(org_slug, project_data["slug"])
-
-            # Get project details if needed
-            details = self.get_project_details(org_slug, project_data["slug"])
-
+        for project_data, teams, details_loader in zip(
+            data, project_teams, details_loaders
+        ):
             project = SentryProject(
-                id=project_data["id"],
-                slug=project_data["slug"],
-                name=project_data["name"],
+                raw_data=project_data,
                 organization=org_slug,
-                platform=project_data.get("platform", "other"),
                 teams=teams,
-                status=project_data.get("status", "unknown"),
-                features=project_data.get("features", []),
-                options=details.get("options", {}),
-                raw_data={**project_data, **details},
+                details_loader=details_loader,
             )
             projects.append(project)
 
@@ -265,7 +460,7 @@ class SentryDiscovery:
         """Get teams assigned to a specific project"""
         logger.debug(f"Fetching teams for project: {org_slug}/{project_slug}")
 
-        data = self._make_request(
+        data = self._cached_request(
             f"/organizations/{org_slug}/projects/{project_slug}/teams/"
         )
         if not isinstance(data, list):
@@ -277,7 +472,9 @@ class SentryDiscovery:
         """Get detailed information about a specific project"""
         logger.debug(f"Fetching details for project: {org_slug}/{project_slug}")
 
-        return self._make_request(f"/organizations/{org_slug}/projects/{project_slug}/")
+        return self._cached_request(
+            f"/organizations/{org_slug}/projects/{project_slug}/"
+        )
 
     def discover_all(
         self,
@@ -285,12 +482,18 @@ class SentryDiscovery:
         projects_only: bool = False,
         teams_only: bool = False,
         progress_callback: Optional[Callable[[int], None]] = None,
+        eager_details: bool = False,
     ) -> Dict[str, Any]:
-        """Discover all resources in Sentry"""
+        """Discover all resources in Sentry
+
+        Per-project details (options etc.) cost one extra request per project
+        and are only fetched and merged into the result when ``eager_details``
+        is set.
+        """
         logger.info("Starting comprehensive discovery")
 
-        if progress_callback:
-            progress_callback(10)
+        report_progress = progress_callback or (lambda _percent: None)
+        report_progress(10)
 
         # Get organizations
         orgs = self.get_organizations()
@@ -307,8 +510,7 @@ class SentryDiscovery:
             org = orgs[0]
             logger.info(f"Using organization: {org.name} ({org.slug})")
 
-        if progress_callback:
-            progress_callback(20)
+        report_progress(20)
 
         result = {"organization": org.raw_data, "teams": [], "projects": []}
 
@@ -318,52 +520,58 @@ class SentryDiscovery:
             teams = self.get_teams(org.slug)
             result["teams"] = [self._serialize_team(team) for team in teams]
 
-            if progress_callback:
-                progress_callback(60)
+            report_progress(60)
 
         # Get projects if not teams-only
         if not teams_only:
             logger.info("Discovering projects...")
-            projects = self.get_projects(org.slug)
+            projects = self.get_projects(org.slug, eager_details=eager_details)
             result["projects"] = [
-                self._serialize_project(project) for project in projects
+                self._serialize_project(project, include_details=eager_details)
+                for project in projects
             ]
 
-            if progress_callback:
-                progress_callback(90)
+            report_progress(90)
 
-        if progress_callback:
-            progress_callback(100)
+        report_progress(100)
 
         logger.info("Discovery completed successfully")
         return result
 
     def _serialize_team(self, team: SentryTeam) -> Dict[str, Any]:
         """Serialize team object to dictionary"""
-        return {
-            "id": team.id,
-            "slug": team.slug,
-            "name": team.name,
-            "organization": team.organization,
-            "members": team.members,
-            "projects": team.projects,
-            **team.raw_data,
-        }
+        # Start from the API payload and overlay the discovered fields once
+        data = dict(team.raw_data)
+        data.update(
+            id=team.id,
+            slug=team.slug,
+            name=team.name,
+            organization=team.organization,
+            members=team.members,
+            projects=team.projects,
+        )
+        return data
 
-    def _serialize_project(self, project: SentryProject) -> Dict[str, Any]:
+    def _serialize_project(
+        self, project: SentryProject, include_details: bool = False
+    ) -> Dict[str, Any]:
         """Serialize project object to dictionary"""
-        return {
-            "id": project.id,
-            "slug": project.slug,
-            "name": project.name,
-            "organization": project.organization,
-            "platform": project.platform,
-            "teams": project.teams,
-            "status": project.status,
-            "features": project.features,
-            "options": project.options,
-            **project.raw_data,
-        }
+        # Start from the API payload and overlay the discovered fields once
+        data = dict(project.raw_data)
+        if include_details:
+            data.update(project.details)
+            data["options"] = project.options
+        data.update(
+            id=project.id,
+            slug=project.slug,
+            name=project.name,
+            organization=project.organization,
+            platform=project.platform,
+            teams=project.teams,
+            status=project.status,
+            features=project.features,
+        )
+        return data
 
     def test_connection(self) -> bool:
         """Test the API connection and authentication"""
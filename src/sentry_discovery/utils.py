@@ -3,14 +3,78 @@
 Utility functions for Sentry Discovery Tool
 """
 
+import atexit
+import fnmatch
+import functools
+import glob
+import hashlib
+import json
+import os
+import queue
 import re
 import logging
+import shutil
+import subprocess
 import sys
-from typing import Optional, Dict, Any
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, Dict, Any, Callable, Tuple
 from pathlib import Path
+from urllib.parse import urlsplit
 
-def setup_logging(verbose: bool = False):
+logger = logging.getLogger(__name__)
+
+# Patterns used by the naming/validation helpers, compiled once
+_SAFE_RES_BAD_RE = re.compile(r'[^a-z0-9_]')
+_UNDERSCORES_RE = re.compile(r'_+')
+_HOSTNAME_RE = re.compile(
+    r'(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
+    r'localhost|'  # localhost...
+    r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}', re.IGNORECASE)  # ...or ip
+_ORG_URL_RE = re.compile(r'sentry\.io/organizations/([^/]+)')
+_TF_VERSION_RE = re.compile(r'Terraform v(\d+\.\d+\.\d+)')
+
+# Minimum reasonable auth token length
+_MIN_TOKEN_LENGTH = 32
+
+_BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
+# Accepted spellings for boolean environment variables
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+_FALSE_VALUES = frozenset({'false', '0', 'no', 'off'})
+
+# Single-pass character substitution tables for the name and escape helpers
+_FILENAME_TRANSLATE = str.maketrans(dict.fromkeys('<>:"/\\|?* ', '_'))
+_RESOURCE_TRANSLATE = {
+    i: i if chr(i) in 'abcdefghijklmnopqrstuvwxyz0123456789_' else ord('_')
+    for i in range(128)
+}
+_TF_ESCAPE = str.maketrans({
+    '\\': '\\\\',
+    '"': '\\"',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\t': '\\t',
+})
+
+# Background log writer installed by setup_logging(background=True)
+_log_listener: Optional[QueueListener] = None
+_log_queue_handler: Optional[QueueHandler] = None
+
+def _stop_log_listener():
+    """Stop the background log writer, flushing queued records, and detach it"""
+    global _log_listener, _log_queue_handler
+    if _log_listener is not None:
+        _log_listener.stop()
+        logging.getLogger().removeHandler(_log_queue_handler)
+        _log_listener = _log_queue_handler = None
+
+atexit.register(_stop_log_listener)
+
+def setup_logging(verbose: bool = False, background: bool = False):
     """Setup logging configuration"""
+    global _log_listener, _log_queue_handler
     level = logging.DEBUG if verbose else logging.INFO
     
     # Create formatter
@@ -26,7 +90,18 @@ def setup_logging(verbose: bool = False):
     # Setup root logger
     logger = logging.getLogger()
     logger.setLevel(level)
-    logger.addHandler(console_handler)
+    _stop_log_listener()
+    if background:
+        # Write records from a background thread so logging callers never
+        # block on stdout. Only for callers that don't interleave their own
+        # stdout output with log lines, since ordering is no longer kept
+        log_queue = queue.Queue(-1)
+        _log_listener = QueueListener(log_queue, console_handler, respect_handler_level=True)
+        _log_queue_handler = QueueHandler(log_queue)
+        _log_listener.start()
+        logger.addHandler(_log_queue_handler)
+    else:
+        logger.addHandler(console_handler)
     
     # Reduce noise from requests library
     logging.getLogger('requests').setLevel(logging.WARNING)
@@ -34,27 +109,21 @@ def setup_logging(verbose: bool = False):
 
 def validate_token(token: str) -> bool:
     """Validate Sentry auth token format"""
-    if not token:
-        return False
-    
     # Accept any reasonable token format
     # Sentry tokens can be:
     # - 64 character hex strings
     # - sntrys_... format
     # - Custom formats for self-hosted instances
-    if len(token) >= 32:  # Minimum reasonable token length
-        return True
-    
-    return False
+    # so a length check is all that is needed; no pattern matching
+    return bool(token) and len(token) >= _MIN_TOKEN_LENGTH
 
 def safe_filename(name: str) -> str:
     """Convert string to safe filename"""
-    # Replace invalid characters
-    safe = re.sub(r'[<>:"/\\|?*]', '_', name)
-    # Replace spaces with underscores
-    safe = safe.replace(' ', '_')
+    # Replace invalid characters and spaces
+    safe = name.translate(_FILENAME_TRANSLATE)
     # Remove multiple underscores
-    safe = re.sub(r'_+', '_', safe)
+    if '__' in safe:
+        safe = _UNDERSCORES_RE.sub('_', safe)
     # Remove leading/trailing underscores
     safe = safe.strip('_')
     # Ensure it's not empty
@@ -65,9 +134,13 @@ def safe_resource_name(name: str) -> str:
     # Convert to lowercase
     safe = name.lower()
     # Replace non-alphanumeric with underscores
-    safe = re.sub(r'[^a-z0-9_]', '_', safe)
+    if safe.isascii():
+        safe = safe.translate(_RESOURCE_TRANSLATE)
+    else:
+        safe = _SAFE_RES_BAD_RE.sub('_', safe)
     # Remove multiple underscores
-    safe = re.sub(r'_+', '_', safe)
+    if '__' in safe:
+        safe = _UNDERSCORES_RE.sub('_', safe)
     # Remove leading/trailing underscores
     safe = safe.strip('_')
     # Ensure it starts with letter or underscore
@@ -79,74 +152,109 @@ def safe_resource_name(name: str) -> str:
 def ensure_directory(path: str) -> Path:
     """Ensure directory exists and return Path object"""
     dir_path = Path(path)
-    dir_path.mkdir(parents=True, exist_ok=True)
+    # A single stat covers the common case of an existing directory
+    if not os.path.isdir(dir_path):
+        dir_path.mkdir(parents=True, exist_ok=True)
     return dir_path
 
 def format_bytes(bytes_count: int) -> str:
     """Format bytes in human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_count < 1024.0:
-            return f"{bytes_count:.1f} {unit}"
-        bytes_count /= 1024.0
-    return f"{bytes_count:.1f} TB"
+    # Each unit spans 10 bits, so the unit index falls out of bit_length()
+    index = min((max(int(bytes_count), 1).bit_length() - 1) // 10, len(_BYTE_UNITS) - 1)
+    return f"{bytes_count / (1 << (10 * index)):.1f} {_BYTE_UNITS[index]}"
 
 def truncate_string(text: str, max_length: int = 50) -> str:
     """Truncate string with ellipsis if too long"""
-    if len(text) <= max_length:
-        return text
-    return text[:max_length-3] + "..."
+    return text if len(text) <= max_length else text[:max_length-3] + "..."
+
+def make_truncator(max_length: int = 50) -> Callable[[str], str]:
+    """Return a truncate_string equivalent with max_length bound, for use in loops"""
+    cut = max_length - 3
+    
+    def truncate(text: str) -> str:
+        return text if len(text) <= max_length else text[:cut] + "..."
+    
+    return truncate
 
 def merge_dicts(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
     """Recursively merge two dictionaries"""
-    result = dict1.copy()
-    for key, value in dict2.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = merge_dicts(result[key], value)
-        else:
-            result[key] = value
+    result = {**dict1}
+    # Walk nested dicts with an explicit stack, copying only the subtrees
+    # that dict2 actually overlaps
+    stack = [(result, dict2)]
+    while stack:
+        dst, src = stack.pop()
+        for key, value in src.items():
+            current = dst.get(key)
+            if isinstance(current, dict) and isinstance(value, dict):
+                dst[key] = current = {**current}
+                stack.append((current, value))
+            else:
+                dst[key] = value
     return result
 
 def validate_url(url: str) -> bool:
     """Validate URL format"""
-    url_pattern = re.compile(
-        r'^https?://'  # http:// or https://
-        r'(?:(?:[A-Z0-9](?:[A-Z0-9-]{0,61}[A-Z0-9])?\.)+[A-Z]{2,6}\.?|'  # domain...
-        r'localhost|'  # localhost...
-        r'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})'  # ...or ip
-        r'(?::\d+)?'  # optional port
-        r'(?:/?|[/?]\S+)$', re.IGNORECASE)
-    return url_pattern.match(url) is not None
+    # Cheap structural checks first; only the hostname goes through a regex
+    if url.split() != [url]:
+        return False
+    lowered = url[:8].lower()
+    if not (lowered.startswith('http://') or lowered == 'https://'):
+        return False
+    try:
+        netloc = urlsplit(url).netloc
+    except ValueError:
+        return False
+    host, sep, port = netloc.partition(':')
+    if sep and not port.isdecimal():
+        return False
+    # Anything after the authority must be "/" or a non-empty path/query
+    rest = url[url.index('//') + 2 + len(netloc):]
+    if rest and rest != '/' and (rest[0] not in '/?' or len(rest) == 1):
+        return False
+    return _HOSTNAME_RE.fullmatch(host) is not None
 
 def extract_org_from_url(url: str) -> Optional[str]:
     """Extract organization slug from Sentry URL"""
     # Match patterns like https://sentry.io/organizations/my-org/
-    pattern = r'sentry\.io/organizations/([^/]+)'
-    match = re.search(pattern, url)
+    match = _ORG_URL_RE.search(url)
     return match.group(1) if match else None
 
 def sanitize_terraform_string(value: str) -> str:
     """Sanitize string for use in Terraform configuration"""
     # Escape special characters
-    escaped = value.replace('\\', '\\\\')
-    escaped = escaped.replace('"', '\\"')
-    escaped = escaped.replace('\n', '\\n')
-    escaped = escaped.replace('\r', '\\r')
-    escaped = escaped.replace('\t', '\\t')
-    return escaped
+    return value.translate(_TF_ESCAPE)
+
+def _team_member_import_id(org_slug: str, resource_slug: str, extra: str) -> str:
+    """Import ID for a team membership: org/team/member"""
+    return f"{org_slug}/{resource_slug}/{extra}"
+
+# Resource types whose import ID carries an extra component; everything
+# else uses the plain org/slug form
+_IMPORT_ID_HANDLERS = {
+    'team_member': _team_member_import_id,
+}
 
 def generate_import_id(org_slug: str, resource_type: str, resource_slug: str, extra: str = None) -> str:
     """Generate Terraform import ID for Sentry resources"""
-    if resource_type == 'team_member' and extra:
-        return f"{org_slug}/{resource_slug}/{extra}"
+    handler = _IMPORT_ID_HANDLERS.get(resource_type)
+    if handler is not None and extra:
+        return handler(org_slug, resource_slug, extra)
     return f"{org_slug}/{resource_slug}"
 
 class ProgressTracker:
     """Simple progress tracking utility"""
     
+    # Minimum seconds between redraws when steps arrive faster than this
+    EMIT_INTERVAL = 1 / 30
+    
     def __init__(self, total_steps: int, description: str = "Processing"):
         self.total_steps = total_steps
         self.current_step = 0
         self.description = description
+        self._fmt = "\r{}: {:.1f}% ({}/" + str(total_steps) + ")"
+        self._emit_every = max(1, total_steps // 1000)
+        self._last_emit = 0.0
     
     def update(self, step: int = None, description: str = None):
         """Update progress"""
@@ -155,11 +263,21 @@ class ProgressTracker:
         else:
             self.current_step += 1
         
+        changed = bool(description) and description != self.description
         if description:
             self.description = description
         
+        now = time.monotonic()
+        if not (changed
+                or self.current_step >= self.total_steps
+                or self.current_step % self._emit_every == 0
+                or now - self._last_emit >= self.EMIT_INTERVAL):
+            return
+        self._last_emit = now
+        
         percentage = (self.current_step / self.total_steps) * 100
-        print(f"\r{self.description}: {percentage:.1f}% ({self.current_step}/{self.total_steps})", end='', flush=True)
+        sys.stdout.write(self._fmt.format(self.description, percentage, self.current_step))
+        sys.stdout.flush()
     
     def finish(self, final_message: str = "Complete"):
         """Finish progress tracking"""
@@ -167,7 +285,6 @@ class ProgressTracker:
 
 def load_json_file(file_path: str) -> Dict[str, Any]:
     """Load JSON file safely"""
-    import json
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             return json.load(f)
@@ -176,7 +293,6 @@ def load_json_file(file_path: str) -> Dict[str, Any]:
 
 def save_json_file(data: Dict[str, Any], file_path: str, indent: int = 2):
     """Save data to JSON file safely"""
-    import json
     try:
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=indent, ensure_ascii=False)
@@ -185,40 +301,44 @@ def save_json_file(data: Dict[str, Any], file_path: str, indent: int = 2):
 
 def get_file_hash(file_path: str) -> str:
     """Get SHA256 hash of file"""
-    import hashlib
-    hash_sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_sha256.update(chunk)
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        hash_sha256 = hashlib.sha256()
+        buf = memoryview(bytearray(1 << 20))
+        while n := f.readinto(buf):
+            hash_sha256.update(buf[:n])
     return hash_sha256.hexdigest()
 
-def check_terraform_installed() -> bool:
-    """Check if Terraform is installed and accessible"""
-    import subprocess
-    try:
-        result = subprocess.run(['terraform', '--version'], 
-                              capture_output=True, text=True, timeout=10)
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError):
-        return False
-
-def get_terraform_version() -> Optional[str]:
-    """Get installed Terraform version"""
-    import subprocess
+@functools.lru_cache(maxsize=1)
+def _terraform_version_output() -> Optional[str]:
+    """Run `terraform --version` once per process; None if unavailable"""
+    if shutil.which('terraform') is None:
+        return None
     try:
         result = subprocess.run(['terraform', '--version'], 
                               capture_output=True, text=True, timeout=10)
         if result.returncode == 0:
-            # Extract version from output like "Terraform v1.5.0"
-            match = re.search(r'Terraform v(\d+\.\d+\.\d+)', result.stdout)
-            return match.group(1) if match else None
+            return result.stdout
     except (subprocess.TimeoutExpired, FileNotFoundError):
         pass
     return None
 
+def check_terraform_installed() -> bool:
+    """Check if Terraform is installed and accessible"""
+    return _terraform_version_output() is not None
+
+def get_terraform_version() -> Optional[str]:
+    """Get installed Terraform version"""
+    output = _terraform_version_output()
+    if output is None:
+        return None
+    # Extract version from output like "Terraform v1.5.0"
+    match = _TF_VERSION_RE.search(output)
+    return match.group(1) if match else None
+
 def validate_terraform_syntax(file_path: str) -> bool:
     """Validate Terraform file syntax"""
-    import subprocess
     try:
         # Change to directory containing the file
         file_dir = Path(file_path).parent
@@ -241,18 +361,15 @@ def format_duration(seconds: float) -> str:
 
 def get_env_bool(env_var: str, default: bool = False) -> bool:
     """Get boolean value from environment variable"""
-    import os
-    value = os.getenv(env_var, '').lower()
-    if value in ('true', '1', 'yes', 'on'):
+    value = os.environ.get(env_var, '').lower()
+    if value in _TRUE_VALUES:
         return True
-    elif value in ('false', '0', 'no', 'off'):
+    elif value in _FALSE_VALUES:
         return False
     return default
 
 def retry_on_exception(max_retries: int = 3, delay: float = 1.0, backoff: float = 2.0):
     """Decorator to retry function on exception"""
-    import time
-    import functools
     
     def decorator(func):
         @functools.wraps(func)
@@ -268,30 +385,74 @@ def retry_on_exception(max_retries: int = 3, delay: float = 1.0, backoff: float
                     if retries > max_retries:
                         raise e
                     
-                    print(f"Attempt {retries} failed: {e}. Retrying in {current_delay} seconds...")
+                    logger.warning("Attempt %d failed: %s. Retrying in %s seconds...",
+                                   retries, e, current_delay)
                     time.sleep(current_delay)
                     current_delay *= backoff
             
         return wrapper
     return decorator
 
+def _scan_matches(prefix: str, name_re, include_hidden: bool, recursive: bool):
+    """Yield paths under prefix whose names match, walking with os.scandir"""
+    # Paths are built as join(prefix, name) rather than DirEntry.path so an
+    # empty prefix (the current directory) yields relative paths, like glob
+    pending = [prefix]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current or os.curdir) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            hidden = entry.name.startswith('.')
+            if name_re.match(entry.name) and (include_hidden or not hidden):
+                yield os.path.join(current, entry.name)
+            if recursive and not hidden and entry.is_dir():
+                subdirs.append(os.path.join(current, entry.name))
+        # Reverse so the stack visits subdirectories in listing order, like glob
+        pending.extend(reversed(subdirs))
+
 def find_files_by_pattern(directory: str, pattern: str) -> list:
     """Find files matching pattern in directory"""
-    import glob
-    search_pattern = str(Path(directory) / pattern)
-    return glob.glob(search_pattern, recursive=True)
+    recursive = pattern.startswith('**/')
+    name = pattern[3:] if recursive else pattern
+    # Plain "name" and "**/name" patterns are matched with a single scandir
+    # walk; anything with directory components goes through glob
+    if '/' in name or os.sep in name or '**' in name:
+        return glob.glob(str(Path(directory) / pattern), recursive=True)
+    name_re = re.compile(fnmatch.translate(name))
+    # Path('.') / pattern drops the '.', so glob reported cwd matches unprefixed
+    prefix = str(Path(directory))
+    if prefix == os.curdir:
+        prefix = ''
+    return list(_scan_matches(prefix, name_re, name.startswith('.'), recursive))
 
-def backup_file(file_path: str) -> str:
-    """Create backup of file with timestamp"""
-    import shutil
-    from datetime import datetime
-    
+def backup_file_with_hash(file_path: str, backup_path: Optional[str] = None) -> Tuple[str, str]:
+    """Copy file to a backup and return (backup path, SHA256 of contents) in one read"""
     path = Path(file_path)
     if not path.exists():
         raise FileNotFoundError(f"File not found: {file_path}")
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    backup_path = path.with_suffix(f".{timestamp}.backup{path.suffix}")
+    if backup_path is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = path.with_suffix(f".{timestamp}.backup{path.suffix}")
+    elif os.path.exists(backup_path) and os.path.samefile(file_path, backup_path):
+        # Opening the destination for writing would truncate the source
+        raise shutil.SameFileError(f"{file_path} and {backup_path} are the same file")
     
-    shutil.copy2(file_path, backup_path)
-    return str(backup_path)
\ No newline at end of file
+    hash_sha256 = hashlib.sha256()
+    buf = memoryview(bytearray(1 << 20))
+    with open(file_path, "rb") as src, open(backup_path, "wb") as dst:
+        while n := src.readinto(buf):
+            chunk = buf[:n]
+            dst.write(chunk)
+            hash_sha256.update(chunk)
+    shutil.copystat(file_path, backup_path)
+    return str(backup_path), hash_sha256.hexdigest()
+
+def backup_file(file_path: str) -> str:
+    """Create backup of file with timestamp"""
+    return backup_file_with_hash(file_path)[0]
\ No newline at end of file